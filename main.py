@@ -2,10 +2,12 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from plotly_resampler import FigureResampler
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import unicodedata
 import io
+import os
 
 # =========================
 # 기본 설정
@@ -31,21 +33,71 @@ html, body, [class*="css"] {
 def normalize_name(name: str):
     return unicodedata.normalize("NFC", name)
 
+@st.cache_data
+def _index_data_dir(directory: Path):
+    return {normalize_name(p.name): p for p in directory.iterdir()}
+
 def find_file_by_name(directory: Path, target_name: str):
-    target_norm = normalize_name(target_name)
-    for file in directory.iterdir():
-        if normalize_name(file.name) == target_norm:
-            return file
-    return None
+    return _index_data_dir(directory).get(normalize_name(target_name))
 
 # =========================
 # 데이터 로딩
 # =========================
+def _snapshot_path(src: Path) -> Path:
+    return src.parent / ".cache" / (src.stem + ".parquet")
+
+
+def _write_parquet_atomic(df, dest: Path):
+    # 임시 파일에 쓴 뒤 교체 — 중간에 죽어도 반쪽짜리 스냅샷이 남지 않는다
+    tmp = dest.with_suffix(".parquet.tmp")
+    df.to_parquet(tmp, compression="zstd")
+    os.replace(tmp, dest)
+
+
+def _read_snapshot(snap: Path):
+    # 손상된 스냅샷이면 None을 돌려 원본 재파싱으로 폴백
+    try:
+        return pd.read_parquet(snap)
+    except Exception:
+        return None
+
+
+def _read_env_csv(file_path):
+    # 파싱 결과를 Parquet으로 남겨 두면 다음 콜드 스타트는 CSV 파싱을 건너뛴다
+    src = Path(file_path)
+    snap = _snapshot_path(src)
+    if snap.exists() and snap.stat().st_mtime_ns >= src.stat().st_mtime_ns:
+        df = _read_snapshot(snap)
+        if df is not None:
+            return df
+
+    df = pd.read_csv(
+        src,
+        engine="pyarrow",
+        dtype_backend="pyarrow",
+        parse_dates=["time"]
+    )
+    # 센서 정밀도(~0.1)에는 float32면 충분 — 메모리와 집계 비용 절반
+    for col in ("temperature", "humidity", "ph", "ec"):
+        df[col] = pd.to_numeric(df[col], downcast="float")
+
+    snap.parent.mkdir(exist_ok=True)
+    _write_parquet_atomic(df, snap)
+    return df
+
+
+# (경로, mtime)을 캐시 키로 써서 파일이 교체되면 자동으로 무효화된다
 @st.cache_data
+def _load_env_frames(path_strs, mtimes_ns):
+    # 파일별 I/O·파싱을 겹쳐서 콜드 로딩 시간을 단축
+    with ThreadPoolExecutor(max_workers=len(path_strs)) as ex:
+        return list(ex.map(_read_env_csv, path_strs))
+
+
 def load_environment_data():
     data_dir = Path("data")
 
-    school_files = {}
+    school_paths = {}
     target_files = [
         "송도고_환경데이터.csv",
         "하늘고_환경데이터.csv",
@@ -57,13 +109,149 @@ def load_environment_data():
         file_path = find_file_by_name(data_dir, name)
         if file_path is None:
             return None
-        school = name.split("_")[0]
-        school_files[school] = pd.read_csv(file_path)
+        school_paths[name.split("_")[0]] = file_path
+
+    paths = tuple(str(p) for p in school_paths.values())
+    mtimes = tuple(p.stat().st_mtime_ns for p in school_paths.values())
+    return dict(zip(school_paths, _load_env_frames(paths, mtimes)))
+
+
+@st.cache_data
+def compute_env_summary(env_data):
+    all_env = pd.concat(
+        [df.assign(학교=school) for school, df in env_data.items()],
+        ignore_index=True
+    )
+    all_env["학교"] = pd.Categorical(all_env["학교"], categories=list(env_data.keys()))
+
+    # 학교×컬럼별 개별 reduction 대신 한 번의 벡터화된 groupby로 집계
+    summary = (
+        all_env.groupby("학교", observed=True)[["temperature", "humidity", "ph", "ec"]]
+        .mean()
+        .reset_index()
+    )
+    summary.columns = ["학교", "온도", "습도", "pH", "EC"]
+    summary["목표 EC"] = summary["학교"].map(ec_conditions)
+    return summary
+
+
+@st.cache_data
+def build_concat_growth(growth_data):
+    concat_df = pd.concat(
+        [df.assign(학교=school) for school, df in growth_data.items()],
+        ignore_index=True
+    )
+    # 문자열 대신 정수 코드로 그룹핑/정렬하도록 범주형으로 변환
+    concat_df["학교"] = pd.Categorical(
+        concat_df["학교"], categories=list(growth_data.keys()), ordered=True
+    )
+    return concat_df
+
+
+@st.cache_data
+def csv_bytes(df):
+    return df.to_csv(index=False).encode("utf-8")
+
+
+@st.cache_data
+def xlsx_bytes(df):
+    buf = io.BytesIO()
+    df.to_excel(buf, index=False, engine="xlsxwriter")
+    return buf.getvalue()
+
+
+@st.cache_resource
+def build_env_bars(avg_df):
+    # 지표별 add_bar 대신 long 포맷 한 번의 px.bar로 — 트레이스/JSON 최소화
+    long = avg_df.melt(
+        id_vars="학교", value_vars=["온도", "습도", "pH", "EC", "목표 EC"]
+    )
+    long["variable"] = long["variable"].replace({"EC": "실측 EC"})
+    # 실측/목표 EC는 같은 축에서 비교해야 하므로 한 facet에 묶는다
+    long["지표"] = long["variable"].replace(
+        {"실측 EC": "목표 EC vs 실측 EC", "목표 EC": "목표 EC vs 실측 EC"}
+    )
+    fig = px.bar(
+        long, x="학교", y="value", color="variable",
+        facet_col="지표", facet_col_wrap=2, barmode="group",
+        labels={"value": ""}
+    )
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+    fig.update_yaxes(matches=None, showticklabels=True)
+    fig.update_layout(
+        height=700,
+        font=dict(family="Malgun Gothic, Apple SD Gothic Neo, sans-serif")
+    )
+    return fig
+
+
+@st.cache_resource
+def build_growth_bars(summary_df):
+    long = summary_df.melt(
+        id_vars=["학교", "EC"],
+        value_vars=["평균 생중량", "평균 잎 수", "평균 지상부 길이", "개체수"]
+    )
+    fig = px.bar(
+        long, x="EC", y="value",
+        facet_col="variable", facet_col_wrap=2,
+        labels={"value": ""}
+    )
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+    fig.update_yaxes(matches=None, showticklabels=True)
+    fig.update_layout(
+        height=700,
+        font=dict(family="Malgun Gothic, Apple SD Gothic Neo, sans-serif")
+    )
+    return fig
+
+
+@st.cache_resource
+def build_growth_box(concat_df):
+    fig = px.box(
+        concat_df,
+        x="학교",
+        y="생중량(g)",
+        color="학교"
+    )
+    fig.update_layout(
+        font=dict(family="Malgun Gothic, Apple SD Gothic Neo, sans-serif")
+    )
+    return fig
 
-    return school_files
+
+@st.cache_resource
+def build_growth_scatter(concat_df, x_col):
+    return px.scatter(
+        concat_df, x=x_col, y="생중량(g)", color="학교", render_mode="webgl"
+    )
 
 
 @st.cache_data
+def _load_growth_sheets(path_str, mtime_ns):
+    # 시트마다 스키마가 다를 수 있으므로 시트별 Parquet으로 스냅샷한다
+    # (파일명 앞의 인덱스가 워크북의 시트 순서를 보존)
+    src = Path(path_str)
+    snap_dir = src.parent / ".cache" / src.stem
+    if snap_dir.exists() and snap_dir.stat().st_mtime_ns >= mtime_ns:
+        files = sorted(snap_dir.glob("*.parquet"))
+        if files:
+            sheets = {f.stem.split("_", 1)[1]: _read_snapshot(f) for f in files}
+            if all(df is not None for df in sheets.values()):
+                return sheets
+
+    # 시트별 재파싱 없이 워크북을 한 번만 읽는다
+    growth_data = pd.read_excel(
+        src, sheet_name=None, engine="calamine", dtype_backend="pyarrow"
+    )
+
+    snap_dir.mkdir(parents=True, exist_ok=True)
+    for old in snap_dir.glob("*.parquet*"):
+        old.unlink()
+    for i, (sheet, df) in enumerate(growth_data.items()):
+        _write_parquet_atomic(df, snap_dir / f"{i:02d}_{sheet}.parquet")
+    return growth_data
+
+
 def load_growth_data():
     data_dir = Path("data")
     xlsx_file = None
@@ -75,13 +263,7 @@ def load_growth_data():
     if xlsx_file is None:
         return None
 
-    xls = pd.ExcelFile(xlsx_file)
-    growth_data = {}
-
-    for sheet in xls.sheet_names:
-        growth_data[sheet] = pd.read_excel(xlsx_file, sheet_name=sheet)
-
-    return growth_data
+    return _load_growth_sheets(str(xlsx_file), xlsx_file.stat().st_mtime_ns)
 
 # =========================
 # 데이터 불러오기
@@ -111,12 +293,6 @@ school_colors = {
     "동산고": "#d62728"
 }
 
-# =========================
-# 사이드바
-# =========================
-schools = ["전체"] + list(env_data.keys())
-selected_school = st.sidebar.selectbox("🏫 학교 선택", schools)
-
 # =========================
 # 제목
 # =========================
@@ -127,82 +303,72 @@ tab1, tab2, tab3 = st.tabs(["📖 실험 개요", "🌡️ 환경 데이터", "
 # =========================
 # Tab 1: 실험 개요
 # =========================
-with tab1:
+@st.fragment
+def render_tab1():
     st.subheader("연구 배경 및 목적")
     st.write("""
     극지 환경에 적응한 식물의 생육 특성을 분석하여  
     **최적 EC(전기전도도) 농도 조건**을 도출하는 것이 본 연구의 목적이다.
     """)
 
-    summary_rows = []
-    total_count = 0
-    temps, hums = [], []
-
-    for school, df in env_data.items():
-        count = len(growth_data.get(school, []))
-        total_count += count
-        temps.append(df["temperature"].mean())
-        hums.append(df["humidity"].mean())
-
-        summary_rows.append({
-            "학교명": school,
-            "EC 목표": ec_conditions.get(school),
-            "개체수": count,
-            "색상": school_colors.get(school)
-        })
+    env_summary = compute_env_summary(env_data)
+
+    school_names = list(env_data)
+    counts = [len(growth_data.get(s, [])) for s in school_names]
+    total_count = sum(counts)
+
+    summary_table = pd.DataFrame({
+        "학교명": school_names,
+        "EC 목표": [ec_conditions.get(s) for s in school_names],
+        "개체수": counts,
+        "색상": [school_colors.get(s) for s in school_names]
+    })
 
-    st.dataframe(pd.DataFrame(summary_rows), use_container_width=True)
+    # 4행짜리 요약은 정적 st.table이 Arrow 직렬화/가상 스크롤보다 싸다
+    st.table(summary_table)
 
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("총 개체수", total_count)
-    c2.metric("평균 온도", f"{sum(temps)/len(temps):.1f} ℃")
-    c3.metric("평균 습도", f"{sum(hums)/len(hums):.1f} %")
+    c2.metric("평균 온도", f"{env_summary['온도'].mean():.1f} ℃")
+    c3.metric("평균 습도", f"{env_summary['습도'].mean():.1f} %")
     c4.metric("최적 EC", "2.0 (하늘고) ⭐")
 
 # =========================
 # Tab 2: 환경 데이터
 # =========================
-with tab2:
-    st.subheader("학교별 환경 평균 비교")
+@st.fragment
+def render_tab2():
+    # 셀렉트박스를 프래그먼트 안에 두어야 학교를 바꿀 때
+    # 전체 스크립트가 아니라 이 프래그먼트만 다시 실행된다
+    schools = ["전체"] + list(env_data.keys())
+    selected_school = st.sidebar.selectbox("🏫 학교 선택", schools)
 
-    avg_df = []
-    for school, df in env_data.items():
-        avg_df.append({
-            "학교": school,
-            "온도": df["temperature"].mean(),
-            "습도": df["humidity"].mean(),
-            "pH": df["ph"].mean(),
-            "EC": df["ec"].mean(),
-            "목표 EC": ec_conditions.get(school)
-        })
-
-    avg_df = pd.DataFrame(avg_df)
-
-    fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=["평균 온도", "평균 습도", "평균 pH", "목표 EC vs 실측 EC"]
-    )
-
-    fig.add_bar(x=avg_df["학교"], y=avg_df["온도"], row=1, col=1)
-    fig.add_bar(x=avg_df["학교"], y=avg_df["습도"], row=1, col=2)
-    fig.add_bar(x=avg_df["학교"], y=avg_df["pH"], row=2, col=1)
+    st.subheader("학교별 환경 평균 비교")
 
-    fig.add_bar(x=avg_df["학교"], y=avg_df["EC"], name="실측 EC", row=2, col=2)
-    fig.add_bar(x=avg_df["학교"], y=avg_df["목표 EC"], name="목표 EC", row=2, col=2)
-
-    fig.update_layout(
-        height=700,
-        font=dict(family="Malgun Gothic, Apple SD Gothic Neo, sans-serif")
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    avg_df = compute_env_summary(env_data)
+    st.plotly_chart(build_env_bars(avg_df), use_container_width=True)
 
     if selected_school != "전체":
         df = env_data[selected_school]
 
-        fig_ts = go.Figure()
-        fig_ts.add_line(x=df["time"], y=df["temperature"], name="온도")
-        fig_ts.add_line(x=df["time"], y=df["humidity"], name="습도")
-        fig_ts.add_line(x=df["time"], y=df["ec"], name="EC")
+        # LTTB 다운샘플링으로 브라우저에 보내는 포인트 수를 제한.
+        # 리샘플러의 relayout 콜백은 Dash 전용이라 Streamlit에서는 연결하지 않는다 —
+        # 줌 시 2000포인트 초기 샘플이 유지되는 정적 다운샘플 동작을 의도적으로 수용.
+        # (plotly_resampler는 Arrow 배열을 받지 못하므로 numpy로 변환해서 전달)
+        time_np = df["time"].to_numpy()
+        fig_ts = FigureResampler(go.Figure(), default_n_shown_samples=2000)
+        fig_ts.add_trace(
+            go.Scattergl(name="온도", mode="lines"),
+            hf_x=time_np, hf_y=df["temperature"].to_numpy()
+        )
+        fig_ts.add_trace(
+            go.Scattergl(name="습도", mode="lines"),
+            hf_x=time_np, hf_y=df["humidity"].to_numpy()
+        )
+        fig_ts.add_trace(
+            go.Scattergl(name="EC", mode="lines"),
+            hf_x=time_np, hf_y=df["ec"].to_numpy()
+        )
         fig_ts.add_hline(y=ec_conditions[selected_school], line_dash="dash", name="목표 EC")
 
         fig_ts.update_layout(
@@ -215,12 +381,9 @@ with tab2:
         for school, df in env_data.items():
             st.write(f"### {school}")
             st.dataframe(df)
-            buffer = io.BytesIO()
-            df.to_csv(buffer, index=False)
-            buffer.seek(0)
             st.download_button(
                 f"{school} CSV 다운로드",
-                data=buffer,
+                data=csv_bytes(df),
                 file_name=f"{school}_환경데이터.csv",
                 mime="text/csv"
             )
@@ -228,7 +391,8 @@ with tab2:
 # =========================
 # Tab 3: 생육 결과
 # =========================
-with tab3:
+@st.fragment
+def render_tab3():
     st.subheader("EC별 생육 결과 비교")
 
     summary = []
@@ -252,50 +416,29 @@ with tab3:
         f"EC {best['EC']}"
     )
 
-    fig2 = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=["평균 생중량 ⭐", "평균 잎 수", "평균 지상부 길이", "개체수"]
-    )
+    st.plotly_chart(build_growth_bars(summary_df), use_container_width=True)
 
-    fig2.add_bar(x=summary_df["EC"], y=summary_df["평균 생중량"], row=1, col=1)
-    fig2.add_bar(x=summary_df["EC"], y=summary_df["평균 잎 수"], row=1, col=2)
-    fig2.add_bar(x=summary_df["EC"], y=summary_df["평균 지상부 길이"], row=2, col=1)
-    fig2.add_bar(x=summary_df["EC"], y=summary_df["개체수"], row=2, col=2)
+    concat_df = build_concat_growth(growth_data)
 
-    fig2.update_layout(
-        height=700,
-        font=dict(family="Malgun Gothic, Apple SD Gothic Neo, sans-serif")
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    st.plotly_chart(build_growth_box(concat_df), use_container_width=True)
 
-    concat_df = pd.concat(
-        [df.assign(학교=school) for school, df in growth_data.items()]
-    )
-
-    fig_box = px.box(
-        concat_df,
-        x="학교",
-        y="생중량(g)",
-        color="학교"
-    )
-    fig_box.update_layout(
-        font=dict(family="Malgun Gothic, Apple SD Gothic Neo, sans-serif")
-    )
-    st.plotly_chart(fig_box, use_container_width=True)
-
-    fig_corr1 = px.scatter(concat_df, x="잎 수(장)", y="생중량(g)", color="학교")
-    fig_corr2 = px.scatter(concat_df, x="지상부 길이(mm)", y="생중량(g)", color="학교")
-
-    st.plotly_chart(fig_corr1, use_container_width=True)
-    st.plotly_chart(fig_corr2, use_container_width=True)
+    st.plotly_chart(build_growth_scatter(concat_df, "잎 수(장)"), use_container_width=True)
+    st.plotly_chart(build_growth_scatter(concat_df, "지상부 길이(mm)"), use_container_width=True)
 
     with st.expander("📥 생육 데이터 다운로드"):
-        buffer = io.BytesIO()
-        concat_df.to_excel(buffer, index=False, engine="openpyxl")
-        buffer.seek(0)
         st.download_button(
             "전체 생육 데이터 XLSX 다운로드",
-            data=buffer,
+            data=xlsx_bytes(concat_df),
             file_name="4개교_생육결과데이터.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
+
+# 탭 내부 인터랙션(학교 선택, 확장 패널, 다운로드)은 해당 프래그먼트만 다시 실행한다
+with tab1:
+    render_tab1()
+
+with tab2:
+    render_tab2()
+
+with tab3:
+    render_tab3()